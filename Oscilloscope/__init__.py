@@ -0,0 +1 @@
+from Oscilloscope.capture import CaptureStore
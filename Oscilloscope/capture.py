@@ -0,0 +1,211 @@
+import os
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from threading import Lock
+from typing import List, Sequence, Tuple
+
+
+class CaptureStore:
+    """
+    CaptureStore 长时间采集的数据存储：
+    数据按块(chunk) 追加写入分段文件，可选zlib 压缩，内存中只保留当前未写满的块，以及每块的起始时刻、
+    文件位置和各通道的最小/最大值组成的稀疏索引。
+    按时刻定位时在索引上二分查找，只读取涉及的块；缩小显示时可以直接使用各块的最小/最大值
+    """
+
+    def __init__(self, directory: str, channels: int, deltaT=0.001, chunk=4096, segment=256,
+                 compress=True, max_segments: int = None, overwrite=False):
+        """
+        参数说明：  
+        - directory: 存放分段文件的目录；  
+        - channels: 每帧的通道数；  
+        - deltaT: 采样间隔(s)，追加数据时未给出时刻则按此推算；  
+        - chunk: 每块的帧数；  
+        - segment: 每个分段文件包含的块数；  
+        - compress: 是否用zlib 压缩每块数据；  
+        - max_segments: 最多保留的分段文件数，超出时删除最旧的，默认不限制；  
+        - overwrite: 目录中已有分段文件时是否删除，默认不删除而是抛出FileExistsError，以免覆盖之前的采集
+        """
+        self.directory = directory
+        self.channels = channels
+        self.deltaT = deltaT
+        self.chunk = chunk
+        self.segment = segment
+        self.compress = compress
+        self.max_segments = max_segments
+        self.frames = 0  # 已追加的总帧数
+        os.makedirs(directory, exist_ok=True)
+        existing = [name for name in os.listdir(directory)
+                    if name.startswith("segment-") and name.endswith(".bin")]
+        if existing and not overwrite:
+            raise FileExistsError("目录%s 中已有之前采集的分段文件！" % directory)
+        for name in existing:
+            os.remove(os.path.join(directory, name))
+
+        # 稀疏索引，每块一项
+        self._starts = []  # 块中第一帧的时刻
+        self._ends = []  # 块中最后一帧的时刻
+        self._locations = []  # (分段序号, 偏移, 字节数, 帧数)
+        self._mins = []
+        self._maxs = []
+
+        self._stride = channels + 1  # 每帧保存时刻及各通道的值
+        self._current = array('d')
+        self._next_time = 0.
+        self._segment = 0
+        self._chunks_in_segment = 0
+        self._file = None
+        self._lock = Lock()
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, "segment-%06d.bin" % segment)
+
+    def append(self, frames: Sequence[Sequence[float]], times: Sequence[float] = None):
+        """
+        追加若干帧数据，times 为各帧的时刻（须递增），默认从上一帧起按deltaT 推算
+        """
+        if isinstance(frames, memoryview):  # RingBufferReader.read() 返回的视图
+            frames = frames.tolist()
+        with self._lock:
+            for i, data in enumerate(frames):
+                if len(data) != self.channels:
+                    raise ValueError("数据的通道数应为%d！" % self.channels)
+                t = self._next_time if times is None else times[i]
+                self._next_time = t + self.deltaT
+                self._current.append(t)
+                self._current.extend(data)
+                self.frames += 1
+                if len(self._current) == self.chunk * self._stride:
+                    self._spill()
+
+    def pull(self, reader) -> int:
+        """
+        从RingBufferReader 读出全部新数据并追加，返回追加的帧数。  
+        各帧的时刻为其序号乘以deltaT，读取端被追上而丢失的帧会在时间轴上留下空缺；
+        复制期间被写入方覆盖的数据整段丢弃，同样计入reader.lost
+        """
+        count = 0
+        while reader.available():
+            view = reader.read()
+            frames = view.tolist()
+            view.release()
+            start = reader.seq - len(frames)
+            if not reader.valid():
+                reader.lost += len(frames)
+                continue
+            self.append(frames, [(start + i) * self.deltaT for i in range(len(frames))])
+            count += len(frames)
+        return count
+
+    def _spill(self):
+        """
+        将当前块写入分段文件并登记索引
+        """
+        chunk, self._current = self._current, array('d')
+        frames = len(chunk) // self._stride
+        columns = [chunk[1 + c::self._stride] for c in range(self.channels)]
+        data = chunk.tobytes()
+        if self.compress:
+            data = zlib.compress(data, 1)
+
+        if self._file is None or self._chunks_in_segment >= self.segment:
+            self._next_segment()
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.flush()
+        self._chunks_in_segment += 1
+
+        self._starts.append(chunk[0])
+        self._ends.append(chunk[-self._stride])
+        self._locations.append((self._segment, offset, len(data), frames))
+        self._mins.append(tuple(min(column) for column in columns))
+        self._maxs.append(tuple(max(column) for column in columns))
+
+    def _next_segment(self):
+        if self._file is not None:
+            self._file.close()
+            self._segment += 1
+        self._file = open(self._path(self._segment), "ab")
+        self._chunks_in_segment = 0
+        if self.max_segments is not None:
+            oldest = self._segment - self.max_segments
+            count = 0
+            while count < len(self._locations) and self._locations[count][0] <= oldest:
+                count += 1
+            if count:
+                for index in (self._starts, self._ends, self._locations, self._mins, self._maxs):
+                    del index[:count]
+            if oldest >= 0 and os.path.exists(self._path(oldest)):
+                os.remove(self._path(oldest))
+
+    def _load(self, i: int) -> array:
+        segment, offset, length, _ = self._locations[i]
+        with open(self._path(segment), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        if self.compress:
+            data = zlib.decompress(data)
+        chunk = array('d')
+        chunk.frombytes(data)
+        return chunk
+
+    def _chunks(self, t0: float, t1: float) -> range:
+        # 起始时刻不晚于t0 的最后一块，到起始时刻早于t1 的最后一块
+        first = max(0, bisect_right(self._starts, t0) - 1)
+        last = bisect_left(self._starts, t1)
+        return range(first, last)
+
+    def span(self) -> Tuple[float, float]:
+        """
+        已保存数据的时间范围
+        """
+        with self._lock:
+            start = self._starts[0] if self._starts else (
+                self._current[0] if self._current else None)
+            end = self._current[-self._stride] if self._current else (
+                self._ends[-1] if self._ends else None)
+            return start, end
+
+    def read(self, t0: float, t1: float) -> Tuple[array, List[array]]:
+        """
+        读取时刻在[t0, t1) 内的数据，返回(时刻, [各通道的值])
+        """
+        with self._lock:
+            chunks = [self._load(i) for i in self._chunks(t0, t1)
+                      if self._ends[i] >= t0]
+            if self._current and self._current[0] < t1:
+                chunks.append(array('d', self._current))
+
+        times = array('d')
+        columns = [array('d') for _ in range(self.channels)]
+        for chunk in chunks:
+            chunk_times = chunk[0::self._stride]
+            lo = bisect_left(chunk_times, t0)
+            hi = bisect_left(chunk_times, t1)
+            if lo == hi:
+                continue
+            times += chunk_times[lo:hi]
+            for c, column in enumerate(columns):
+                column += chunk[1 + c::self._stride][lo:hi]
+        return times, columns
+
+    def summary(self, t0: float, t1: float) -> List[Tuple[float, float, tuple, tuple]]:
+        """
+        不读取文件，返回[t0, t1) 内各块的(起始时刻, 结束时刻, 各通道最小值, 各通道最大值)，
+        用于缩小显示时绘制包络
+        """
+        with self._lock:
+            return [(self._starts[i], self._ends[i], self._mins[i], self._maxs[i])
+                    for i in self._chunks(t0, t1) if self._ends[i] >= t0]
+
+    def close(self):
+        """
+        写出未满的块并关闭文件
+        """
+        with self._lock:
+            if self._current:
+                self._spill()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
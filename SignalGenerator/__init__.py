@@ -1,4 +1,8 @@
-from SignalGenerator.base import Generator
+from SignalGenerator.base import Generator, GeneratorGroup, IPollingPort, PollingGenerator
 from SignalGenerator.ports import *
 from SignalGenerator.functions import *
-from SignalGenerator.ui_signal_generator import Ui_MainWindow
+from SignalGenerator.ringbuffer import RingBufferReader
+try:
+    from SignalGenerator.ui_signal_generator import Ui_MainWindow
+except ImportError:  # 未安装PySide2 时仍可使用信号发生器，只是没有图形界面
+    pass
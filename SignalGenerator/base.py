@@ -1,6 +1,11 @@
 import abc
-from threading import Event, Thread
-from typing import List, Union
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, repeat
+from threading import Event, Lock, Thread
+from time import perf_counter, sleep
+from typing import BinaryIO, List, Union
 
 
 class IPort(abc.ABC):
@@ -46,6 +51,50 @@ class IPort(abc.ABC):
         self.wait_port_available()
         self.send_data(data)
 
+    def flush(self):
+        """
+        立即写出端口中缓存的数据，发生器暂停时在其线程中调用
+        """
+
+    def admit(self, rate: float) -> float:
+        """
+        准入检查：告知端口请求的输出速率（帧/s），返回端口实际能够承受的速率。  
+        带宽有限的端口可以在此降低精度或抽取数据
+        """
+        return rate
+
+    def send_block(self, frames: List[List[float]]):
+        """
+        一次写入多帧数据，可以重写此方法实现批量写入
+        """
+        for data in frames:
+            self.send(data)
+
+
+class IPollingPort(IPort):
+    """
+    IPollingPort 支持应答模式的端口：
+    由设备发来请求帧，端口用预先编码好的数据应答，配合PollingGenerator 使用
+    """
+
+    @abc.abstractmethod
+    def encode(self, data: List[float]) -> bytes:
+        """
+        将一帧数据编码为发送的字节
+        """
+
+    @abc.abstractmethod
+    def wait_request(self, timeout: float = None) -> bytes:
+        """
+        等待设备发来的请求帧，超时返回None
+        """
+
+    @abc.abstractmethod
+    def respond(self, payload: bytes, frames: int = 1):
+        """
+        立即发送已编码的应答数据，frames 为其中包含的帧数
+        """
+
 
 class IFunction(abc.ABC):
     """
@@ -75,13 +124,82 @@ class IFunction(abc.ABC):
         重置函数：计数器、当前值等
         """
 
+    def render(self, count: int, pool: ProcessPoolExecutor = None, chunk=1 << 16) -> array:
+        """
+        连续计算count 步并返回结果，之后函数的状态与调用count 次call() 相同。  
+        默认逐步调用call()，可以重写此方法加速
+        """
+        call = self.call
+        return array('d', [call() for _ in range(count)])
+
+
+def ramp(first: float, step: float, count: int):
+    """
+    返回first, first+step, ... 共count 个值的迭代器，逐项累加，与call() 中timer 的推进方式相同
+    """
+    if count <= 0:
+        return iter(())
+    return accumulate(repeat(step, count - 1), initial=first)
+
+
+class ClosedFormFunction(IFunction):
+    """
+    闭式信号函数：任意时刻的值只与timer 有关，离线渲染时可以分段并行计算。  
+    子类需要实现at()，重写render_chunk() 可以避免逐点调用at()
+    """
+
+    @abc.abstractmethod
+    def at(self, timer: float) -> float:
+        """
+        函数在timer 时刻的值
+        """
+
+    def times(self, start: int, count: int):
+        """
+        从当前时刻起第start 步开始的count 个时刻，段内逐项累加
+        """
+        return ramp(self.timer + start * self.deltaT, self.deltaT, count)
+
+    def render_chunk(self, start: int, count: int) -> array:
+        """
+        计算从当前时刻起第start 步开始的count 个值，不改变函数状态
+        """
+        return array('d', map(self.at, self.times(start, count)))
+
+    def render(self, count: int, pool: ProcessPoolExecutor = None, chunk=1 << 16) -> array:
+        """
+        按chunk 分段计算，提供进程池时各段并行计算。  
+        每段的起始时刻按timer + start*deltaT 计算，因此结果只与chunk 有关，与是否使用进程池无关；
+        与逐步调用call() 相比存在舍入误差量级的差别（20 万步的相对误差约1e-11）
+        """
+        starts = range(0, count, chunk)
+        counts = [min(chunk, count - start) for start in starts]
+        if pool is None or count <= chunk:
+            parts = map(self.render_chunk, starts, counts)
+        else:
+            parts = pool.map(_render_chunk, repeat(self), starts, counts)
+        values = array('d')
+        for part in parts:
+            values += part
+        self.timer += count * self.deltaT
+        if count:
+            self.value = values[-1]
+        return values
+
+
+def _render_chunk(func: ClosedFormFunction, start: int, count: int) -> array:
+    # 进程池中执行的任务需要是模块级函数
+    return func.render_chunk(start, count)
+
 
 class Generator(Thread):
     """
     Generator 信号发生器类:
-    本质上是一个线程，其中包含一个run() 函数，用于不间断地产生信号。此线程为守护线程，会在主线程退出后自动结束。 
+    本质上是一个线程，其中包含一个run() 函数，按墙上时钟每隔deltaT 产生一帧信号。此线程为守护线程，会在主线程退出后自动结束。 
     """
 
+    MAX_LAG = 0.1  # 落后时钟超过此时长(s) 时不再追赶，从当前时刻重新计时
+
     def __init__(self, deltaT: float, funcs: Union[IFunction, List[IFunction]], ports: Union[IPort, List[IPort]]):
         """ 
         参数说明：  
@@ -100,6 +218,8 @@ class Generator(Thread):
         self.funcs = funcs if isinstance(funcs, list) else [funcs]
         self.ports = ports if isinstance(ports, list) else [ports]
 
+        self.admitted = []  # 各端口准入后实际能够承受的速率（帧/s）
+
         # 私有属性
         self.pause_flag = Event()
         self.stop_flag = Event()
@@ -116,6 +236,7 @@ class Generator(Thread):
     def turn_on(self):
         for port in self.ports:
             port.turn_on()
+        self.admitted = [port.admit(1. / self.deltaT) for port in self.ports]
         self.start()
 
     def resume(self):
@@ -140,18 +261,250 @@ class Generator(Thread):
 
     def stop(self):
         """
-        停止执行并退出
+        停止执行并退出，端口由线程退出循环后关闭，不会打断正在进行的读写
         """
         self.stop_flag.set()
+        self.pause_flag.set()  # 唤醒暂停中的线程使其退出
+        if not self.is_alive():
+            self._turn_off()
+
+    def _flush(self):
+        for port in self.ports:
+            port.flush()
+
+    def _turn_off(self):
         for port in self.ports:
             port.turn_off()
 
+    def render(self, duration: float, file: Union[str, BinaryIO] = None, workers: int = None,
+               chunk=1 << 16) -> List[array]:
+        """
+        离线渲染：按虚拟时钟尽快计算duration 秒内所有通道的信号，不经过端口发送，也不需要启动线程。  
+        参数说明：  
+        - duration: 信号的时长(s)，共产生round(duration/deltaT) 帧；  
+        - file: 文件路径或二进制文件对象，按帧交错写入本机字节序的float64；  
+        - workers: 并行计算闭式函数的进程数，默认为CPU 核数；  
+        - chunk: 每个并行任务计算的步数
+
+        返回每个通道一个array('d')
+        """
+        count = int(round(duration / self.deltaT))
+        parallel = any(isinstance(func, ClosedFormFunction)
+                       for func in self.funcs) and count > chunk
+        pool = ProcessPoolExecutor(workers) if parallel else None
+        try:
+            columns = [func.render(count, pool, chunk) for func in self.funcs]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if file is not None:
+            channels = len(columns)
+            frames = array('d', [0.]) * (count * channels)
+            for i, column in enumerate(columns):
+                frames[i::channels] = column
+            if isinstance(file, str):
+                with open(file, "wb") as f:
+                    frames.tofile(f)
+            else:
+                frames.tofile(file)
+        return columns
+
+    def step(self):
+        """
+        产生一帧数据并发送到所有端口
+        """
+        data = [func.call() for func in self.funcs]
+        for port in self.ports:
+            port.send(data)
+
+    def run(self):
+        epoch, tick = None, 0
+        while True:
+            if not self.pause_flag.is_set():
+                epoch = None  # 继续执行后重新计时
+                self._flush()  # 暂停前缓存的数据不再等待后续的帧
+            self.pause_flag.wait()  # 暂停线程
+            if self.stop_flag.is_set():
+                break  # 退出线程
+
+            now = perf_counter()
+            if epoch is None:
+                epoch, tick = now, 0
+            delay = epoch + tick * self.deltaT - now
+            if delay > 0:
+                sleep(min(delay, 0.01))  # 分段等待，以便及时响应暂停与停止
+                continue
+            if -delay > self.MAX_LAG:
+                epoch, tick = now, 0
+            self.step()
+            tick += 1
+        self._turn_off()
+
+
+class PollingGenerator(Generator):
+    """
+    PollingGenerator 应答式信号发生器：
+    由设备决定节拍，端口每收到一个请求帧，就用预先计算并编码好的下一块数据应答，适用于硬件在环测试。  
+    请求与应答使用同一个端口，端口需要实现IPollingPort
+    """
+
+    def __init__(self, deltaT: float, funcs: Union[IFunction, List[IFunction]], port: IPollingPort,
+                 block=1, prefetch=256, timeout=0.1):
+        """
+        参数说明：  
+        - port: 接收请求并发送应答的端口；  
+        - block: 每次应答包含的帧数；  
+        - prefetch: 预取缓冲区中保持的应答数；  
+        - timeout: 等待请求的超时时间(s)，超时后检查暂停与停止标志
+        """
+        if not isinstance(port, IPollingPort):
+            raise TypeError("应答模式的端口需要实现IPollingPort！")
+        super().__init__(deltaT, funcs, port)
+        self.block = block
+        self.prefetch = max(1, prefetch)
+        self.timeout = timeout
+        self.responses = 0
+        self.buffer = deque()
+
+    def turn_on(self):
+        for port in self.ports:
+            port.turn_on()
+        self.start()
+
+    def reset(self):
+        super().reset()
+        self.buffer.clear()
+
+    def refill(self):
+        """
+        将预取缓冲区填满，在两次请求之间执行
+        """
+        port = self.ports[0]
+        while len(self.buffer) < self.prefetch:
+            self.buffer.append(b"".join(port.encode([func.call() for func in self.funcs])
+                                        for _ in range(self.block)))
+
+    def run(self):
+        port = self.ports[0]
+        self.refill()
+        while True:
+            self.pause_flag.wait()  # 暂停线程
+            if self.stop_flag.is_set():
+                break  # 退出线程
+
+            if port.wait_request(self.timeout) is None:
+                continue
+            port.respond(self.buffer.popleft(), self.block)
+            self.responses += 1
+            self.refill()
+        self._turn_off()
+
+
+class GeneratorGroup(Thread):
+    """
+    GeneratorGroup 同步信号发生器组：
+    用一个调度线程、统一的时钟和起点驱动多个Generator，组内的发生器不再启动各自的线程。  
+    调度的节拍为deltaT，步长为其整数倍的发生器每隔相应的节拍数输出一帧，各端口的输出按采样点对齐。  
+    开始、暂停、继续和停止对整个组同时生效
+    """
+
+    MAX_LAG = Generator.MAX_LAG
+
+    def __init__(self, generators: List[Generator], deltaT: float = None):
+        """
+        参数说明：  
+        - generators: 组内的信号发生器；  
+        - deltaT: 调度的节拍(s)，默认为各发生器步长中的最小值；各发生器的步长必须是它的整数倍
+        """
+        Thread.__init__(self)
+        self.daemon = True
+        self.generators = generators
+        self.deltaT = deltaT if deltaT else min(g.deltaT for g in generators)
+        self.every = []
+        for g in generators:
+            ratio = g.deltaT / self.deltaT
+            if round(ratio) < 1 or abs(ratio - round(ratio)) > 1e-6 * ratio:
+                raise ValueError("发生器的步长%g 不是节拍%g 的整数倍！" %
+                                 (g.deltaT, self.deltaT))
+            self.every.append(round(ratio))
+        self.tick = 0  # 已执行的节拍数
+        self.epoch = None  # 第0 个节拍对应的时刻，暂停时为None
+
+        self.lock = Lock()
+        self.pause_flag = Event()
+        self.stop_flag = Event()
+
+    def turn_on(self):
+        for g in self.generators:
+            for port in g.ports:
+                port.turn_on()
+                port.admit(1. / g.deltaT)
+        self.start()
+
+    def resume(self):
+        """
+        继续执行，时钟从暂停时的节拍接着计时
+        """
+        with self.lock:
+            if self.epoch is None:
+                self.epoch = perf_counter() - self.tick * self.deltaT
+            self.pause_flag.set()
+
+    def pause(self):
+        with self.lock:
+            self.pause_flag.clear()
+            self.epoch = None
+
+    def reset(self):
+        """
+        重置所有发生器的函数，并从第0 个节拍重新开始
+        """
+        with self.lock:
+            for g in self.generators:
+                g.reset()
+            self.tick = 0
+            if self.epoch is not None:
+                self.epoch = perf_counter()
+
+    def stop(self):
+        """
+        停止执行并退出，端口由调度线程完成当前节拍后关闭
+        """
+        with self.lock:
+            self.stop_flag.set()
+            self.pause_flag.set()  # 唤醒调度线程使其退出
+        if not self.is_alive():
+            self._turn_off()
+
+    def _turn_off(self):
+        for g in self.generators:
+            g._turn_off()
+
     def run(self):
         while True:
+            if not self.pause_flag.is_set():
+                for g in self.generators:
+                    g._flush()
             self.pause_flag.wait()  # 暂停线程
             if self.stop_flag.is_set():
                 break  # 退出线程
 
-            data = [func.call() for func in self.funcs]
-            for port in self.ports:
-                port.send(data)
+            # 在锁内决定本节拍由哪些发生器输出，输出本身在锁外进行，慢速端口不会阻塞暂停与停止
+            with self.lock:
+                if self.epoch is None or self.stop_flag.is_set():
+                    continue
+                now = perf_counter()
+                delay = self.epoch + self.tick * self.deltaT - now
+                if delay <= 0:
+                    if -delay > self.MAX_LAG:  # 落后太多时不再追赶，平移时钟
+                        self.epoch = now - self.tick * self.deltaT
+                    due = [g for g, every in zip(self.generators, self.every)
+                           if self.tick % every == 0]
+                    self.tick += 1
+            if delay > 0:
+                sleep(min(delay, 0.01))  # 分段等待，以便及时响应暂停与停止
+                continue
+            for g in due:
+                g.step()
+        self._turn_off()
@@ -1,12 +1,20 @@
+from array import array
+from itertools import accumulate, islice
 from math import sin
-from SignalGenerator.base import IFunction
+from SignalGenerator.base import ClosedFormFunction, IFunction, ramp
 
 
-class DefaultFunction(IFunction):
+class DefaultFunction(ClosedFormFunction):
     """
     默认信号产生函数，返回值是时间本身
     """
 
+    def at(self, timer):
+        return timer
+
+    def render_chunk(self, start, count):
+        return array('d', self.times(start, count))
+
     def call(self):
         self.value = self.timer
         self.timer += self.deltaT
@@ -27,16 +35,33 @@ class DIntTFunction(IFunction):
         self.timer += self.deltaT
         return self.value
 
+    def render(self, count, pool=None, chunk=1 << 16):
+        # 状态依赖前一步的结果：增量timer*deltaT 本身是等差数列，两次前缀和即可算出
+        deltaT = self.deltaT
+        increments = ramp(self.timer * deltaT, deltaT * deltaT, count)
+        values = array('d', islice(accumulate(
+            increments, initial=self.value), 1, None))
+        self.timer += count * deltaT
+        if count:
+            self.value = values[-1]
+        return values
+
     def reset(self):
         self.timer = 0.
         self.value = 0.
 
 
-class CIntTFunction(IFunction):
+class CIntTFunction(ClosedFormFunction):
     """
     连续时间的积分信号
     """
 
+    def at(self, timer):
+        return timer*timer*0.5
+
+    def render_chunk(self, start, count):
+        return array('d', [t*t*0.5 for t in self.times(start, count)])
+
     def call(self):
         self.value = self.timer*self.timer*0.5
         self.timer += self.deltaT
@@ -47,7 +72,7 @@ class CIntTFunction(IFunction):
         self.value = 0.
 
 
-class SinFunction(IFunction):
+class SinFunction(ClosedFormFunction):
     """
     连续时间的积分信号
     """
@@ -58,10 +83,16 @@ class SinFunction(IFunction):
         self.omega = omega
         self.phi = phi
 
+    def at(self, timer):
+        return self.A*sin(self.omega*timer+self.phi)
+
+    def render_chunk(self, start, count):
+        A, omega, phi = self.A, self.omega, self.phi
+        return array('d', [A*sin(omega*t+phi) for t in self.times(start, count)])
+
     def call(self):
         self.value = self.A*sin(self.omega*self.timer+self.phi)
         self.timer += self.deltaT
-        print(self.value)
         return self.value
 
     def reset(self):
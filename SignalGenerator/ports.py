@@ -1,42 +1,236 @@
-import datetime
-from datetime import datetime
-from time import sleep
-from SignalGenerator.base import IPort
-from serial import Serial
+import abc
+import io
+import ipaddress
+import socket
+import struct
+import sys
+from array import array
+from math import ceil
+from multiprocessing.shared_memory import SharedMemory
+from time import monotonic, sleep, time
+from typing import BinaryIO, List, Tuple, Union
+from SignalGenerator.base import IPollingPort, IPort
+from SignalGenerator import ringbuffer
+from serial import PARITY_NONE, Serial
 
 
-class DefaultPort(IPort):
+class TextPort(IPort):
     """
-    DefaultPort 默认端口： 
-    至少间隔0.5s 可以向控制台发送数据，用于程序逻辑的验证
+    TextPort 文本端口：
+    将数据格式化为CSV/TSV 文本，整块格式化后批量写入标准输出或文件，适合作为shell 管道的数据源
     """
 
-    def __init__(self) -> None:
+    def __init__(self, file: Union[str, BinaryIO] = None, sep=",", precision=6, timestamp=False,
+                 block=4096, bufsize=1 << 20) -> None:
+        """
+        参数说明：  
+        - file: 文件路径或文件对象（二进制或文本），默认为标准输出；  
+        - sep: 分隔符，"," 为CSV，"\t" 为TSV；  
+        - precision: 有效数字位数；  
+        - timestamp: 是否在每行开头输出Unix 时间戳，send_block() 写入的一整块共用同一个时间戳；  
+        - block: 缓存多少帧后整块写入；  
+        - bufsize: 打开文件时使用的缓冲区大小
+        """
         super().__init__()
+        self.file = file
+        self.sep = sep
+        self.precision = precision
+        self.timestamp = timestamp
+        self.block = block
+        self.bufsize = bufsize
+        self._is_on = False
+        self._out = None
+        self._binary = True
+        self._values = []
+        self._frames = 0
+        self._channels = 0
+        self._line = None  # 一行的格式字符串
+        self._block_format = None  # (block, 整块的格式字符串)
 
     def turn_on(self):
         if not self._is_on:
+            if self.file is None:
+                # 标准输出可能被替换为文本流，图形界面程序中甚至为None
+                if sys.stdout is None:
+                    raise IOError("端口打开异常！")
+                self._out = getattr(sys.stdout, "buffer", sys.stdout)
+            elif isinstance(self.file, str):
+                self._out = open(self.file, "wb", buffering=self.bufsize)
+            else:
+                self._out = self.file
+            self._binary = not isinstance(self._out, io.TextIOBase)
             self._is_on = True
 
     def turn_off(self):
-        self._is_on = False
+        if self._is_on:
+            self.flush()
+            self._is_on = False
+            self._out.flush()
+            if isinstance(self.file, str):
+                self._out.close()
+            self._out = None
 
     def wait_port_available(self):
-        while True:
-            sleep(0.5)
-            break
+        pass
 
-    def send_data(self, data: any):
-        if(self._is_on):
-            print("[%s] Port send: %s" % (datetime.now(), data))
-        else:
+    def _format(self, frames: int) -> str:
+        # 一次% 运算即可格式化整块数据；只缓存一行和整块block 帧的格式，其他帧数临时拼接
+        if frames != self.block:
+            return self._line * frames
+        if self._block_format is None or self._block_format[0] != frames:
+            self._block_format = (frames, self._line * frames)
+        return self._block_format[1]
+
+    def _reshape(self, channels: int):
+        if channels != self._channels:
+            self.flush()
+            self._channels = channels
+            line = self.sep.join(["%%.%dg" % self.precision] * channels)
+            if self.timestamp:
+                line = "%.6f" + self.sep + line
+            self._line = line + "\n"
+            self._block_format = None
+
+    def send_data(self, data: List[float]):
+        if not self._is_on:
             raise IOError("端口打开异常！")
+        self._reshape(len(data))
+        if self.timestamp:
+            self._values.append(time())
+        self._values += data
+        self._frames += 1
+        if self._frames >= self.block:
+            self.flush()
+
+    def send_block(self, frames: List[List[float]]):
+        if not self._is_on:
+            raise IOError("端口打开异常！")
+        if not frames:
+            return
+        channels = len(frames[0])
+        for data in frames:
+            if len(data) != channels:
+                raise ValueError("数据的通道数应为%d！" % channels)
+        self._reshape(channels)
+        now = time()
+        for data in frames:
+            if self.timestamp:
+                self._values.append(now)
+            self._values += data
+        self._frames += len(frames)
+        if self._frames >= self.block:
+            self.flush()
+
+    def flush(self):
+        """
+        立即格式化并写出缓存的全部帧
+        """
+        if self._frames == 0:
+            return
+        text = self._format(self._frames) % tuple(self._values)
+        self._values = []
+        self._frames = 0
+        self._out.write(text.encode() if self._binary else text)
 
 
-class SerialPort(Serial, IPort):
-    def __init__(self, *args, **kwargs):
+class DefaultPort(TextPort):
+    """
+    DefaultPort 默认端口：
+    带时间戳向控制台输出数据，用于程序逻辑的验证
+    """
+
+    def __init__(self) -> None:
+        super().__init__(sep="\t", timestamp=True, block=1)
+
+    def flush(self):
+        super().flush()
+        if self._out is not None:
+            self._out.flush()  # 及时显示在控制台
+
+
+class SerialPort(Serial, IPollingPort):
+    """
+    SerialPort 串口：
+    每帧发送第一个通道的值。根据波特率、数据位、校验位和停止位计算链路的字节预算，
+    请求的速率超出预算时自动降低精度或抽取（丢弃）数据，发送中也会根据out_waiting 检测链路是否饱和。  
+    发送速率由Generator 的时钟决定，端口本身不等待。  
+    配合PollingGenerator 使用时，以request 结尾的一段数据视为一个请求帧
+    """
+
+    def __init__(self, *args, precision: int = None, min_precision=3, max_latency=0.1,
+                 request=b"\n", **kwargs):
+        """
+        参数说明（其余参数与Serial 相同）：  
+        - precision: 有效数字位数，默认为None，即完整输出；  
+        - min_precision: 自动降低精度时的下限；  
+        - max_latency: 允许在发送缓冲区中积压的数据时长(s)，超过即认为链路饱和；  
+        - request: 请求帧的结束符
+        """
         super(IPort, self).__init__()
         super().__init__(*args, **kwargs)
+        self.precision = precision
+        self.min_precision = min_precision
+        self.max_latency = max_latency
+        self.rate = None  # 请求的速率（帧/s）
+        self.decimation = 1  # 每decimation 帧发送一帧
+        self.sent_samples = 0
+        self.dropped_samples = 0
+        self.sent_bytes = 0
+        self._min_decimation = 1
+        self._max_precision = precision  # 链路恢复后精度最多回升到此值
+        self.request = request
+        self._skip = 0
+        self._started = None
+        self._listening = False
+
+    def byte_rate(self) -> float:
+        """
+        链路的字节预算（字节/s），每个字符包含1 位起始位
+        """
+        bits = 1 + self.bytesize + \
+            (0 if self.parity == PARITY_NONE else 1) + self.stopbits
+        return self.baudrate / bits
+
+    def frame_size(self) -> int:
+        """
+        按当前精度估算的一帧最大字节数
+        """
+        if self.precision is None:
+            return len("%s\n\r" % -1.2345678901234567e-100)
+        return len("%.*g\n\r" % (self.precision, -1.2345678901234567e-100))
+
+    def encode(self, data: List[float]) -> bytes:
+        if self.precision is None:
+            return str.encode("%s\n\r" % data[0])
+        return str.encode("%.*g\n\r" % (self.precision, data[0]))
+
+    def admit(self, rate: float) -> float:
+        budget = self.byte_rate()
+        self.rate = rate
+        if rate * self.frame_size() > budget and self.precision is None:
+            self.precision = 17
+        while rate * self.frame_size() > budget and self.precision > self.min_precision:
+            self.precision -= 1
+        self._max_precision = self.precision
+        self.decimation = self._min_decimation = max(
+            1, ceil(rate * self.frame_size() / budget))
+        return rate / self.decimation
+
+    def throughput(self) -> dict:
+        """
+        统计实际的吞吐量与丢弃的数据
+        """
+        elapsed = monotonic() - self._started if self._started else 0.
+        return {
+            "budget_bytes_per_second": self.byte_rate(),
+            "requested_samples_per_second": self.rate,
+            "samples_per_second": self.sent_samples / elapsed if elapsed else 0.,
+            "bytes_per_second": self.sent_bytes / elapsed if elapsed else 0.,
+            "sent_samples": self.sent_samples,
+            "dropped_samples": self.dropped_samples,
+            "decimation": self.decimation,
+            "precision": self.precision,
+        }
 
     def turn_on(self):
         if(not self.isOpen()):
@@ -53,9 +247,355 @@ class SerialPort(Serial, IPort):
             sleep(0.001)
             break
 
+    def flush(self):
+        """
+        等待发送缓冲区中的数据全部发出，端口已关闭时不做任何事
+        """
+        if self.isOpen():
+            super().flush()
+
+    def wait_request(self, timeout: float = None) -> bytes:
+        if not self._listening:
+            self._listening = True
+            try:
+                self.set_low_latency_mode(True)  # 仅部分POSIX 串口驱动支持
+            except (AttributeError, IOError, ValueError):
+                pass
+        if self.timeout != timeout:
+            self.timeout = timeout
+        request = self.read_until(self.request)
+        return request if request.endswith(self.request) else None
+
+    def respond(self, payload: bytes, frames: int = 1):
+        if not self.isOpen():
+            raise IOError("端口打开异常！")
+        if self._started is None:
+            self._started = monotonic()
+        self.write(payload)
+        self.sent_samples += frames
+        self.sent_bytes += len(payload)
+
+    def _saturated(self) -> bool:
+        """
+        根据发送缓冲区中积压的字节数调整精度与抽取比例，返回链路是否饱和。  
+        饱和时先降低精度再增大抽取比例，恢复时按相反的顺序回到准入时的设置
+        """
+        waiting = self.out_waiting
+        limit = self.byte_rate() * self.max_latency
+        if waiting > limit:
+            if self.precision is not None and self.precision > self.min_precision:
+                self.precision -= 1
+            else:
+                self.decimation += 1
+            return True
+        if waiting < limit / 4:
+            if self.decimation > self._min_decimation:
+                self.decimation -= 1
+            elif self.precision is not None and self._max_precision is not None \
+                    and self.precision < self._max_precision:
+                self.precision += 1
+        return False
+
     def send_data(self, data: any):
         if(self.isOpen()):
-            self.write(str.encode("%s\n\r" % data[0]))
-            sleep(0.1)  # 防止发送速度过快，人眼看不清
+            if self._started is None:
+                self._started = monotonic()
+            if self._skip > 0:
+                self._skip -= 1
+                self.dropped_samples += 1
+                return
+            self._skip = self.decimation - 1
+            if self._saturated():
+                self.dropped_samples += 1
+                return
+            frame = self.encode(data)
+            self.write(frame)
+            self.sent_samples += 1
+            self.sent_bytes += len(frame)
         else:
             raise IOError("端口打开异常！")
+
+
+class NetworkPort(IPort):
+    """
+    NetworkPort 网络端口的基类：
+    将多帧数据以float64（小端）打包进同一个数据包，包长不超过MTU 或等待超过max_delay 时发送。
+    每个数据包以8 字节的包头开始：序号(uint32)、帧数(uint16)、每帧通道数(uint16)
+    """
+
+    HEADER = struct.Struct("<IHH")
+
+    def __init__(self, mtu=1472, max_delay=0.01, sndbuf=1 << 22) -> None:
+        """
+        参数说明：  
+        - mtu: 单个数据包的最大字节数（含包头），UDP 默认为1500-20-8；  
+        - max_delay: 数据在缓冲区中停留的最长时间(s)，避免低速时迟迟不发送；  
+        - sndbuf: 套接字的发送缓冲区大小
+        """
+        super().__init__()
+        self.mtu = mtu
+        self.max_delay = max_delay
+        self.sndbuf = sndbuf
+        self.seq = 0
+        self.dropped = 0  # 因发送缓冲区已满而丢弃的数据包数
+        self._is_on = False
+        self._buffer = bytearray()
+        self._frames = 0
+        self._channels = 0
+        self._frame = None
+        self._flushed = 0.  # 上一次发送的时刻
+
+    def _socket(self, type):
+        sock = socket.socket(socket.AF_INET, type)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+        sock.setblocking(False)
+        return sock
+
+    def wait_port_available(self):
+        pass
+
+    def send_data(self, data: List[float]):
+        if not self._is_on:
+            raise IOError("端口打开异常！")
+        if len(data) != self._channels:  # 通道数变化时先发出已有的数据
+            frame = struct.Struct("<%dd" % len(data))
+            if self.HEADER.size + frame.size > self.mtu:
+                raise ValueError("一帧%d 个通道超出了MTU（%d 字节）！" %
+                                 (len(data), self.mtu))
+            self.flush()
+            self._channels = len(data)
+            self._frame = frame
+        self._buffer += self._frame.pack(*data)
+        self._frames += 1
+        # 距上一次发送已超过max_delay 时立即发送，低速时每帧不必等到下一帧到来
+        if (self.HEADER.size + len(self._buffer) + self._frame.size > self.mtu
+                or self._frames == 0xFFFF
+                or monotonic() - self._flushed >= self.max_delay):
+            self.flush()
+
+    def flush(self):
+        """
+        立即发送缓冲区中的全部帧
+        """
+        if self._frames == 0:
+            return
+        packet = self.HEADER.pack(self.seq, self._frames,
+                                  self._channels) + self._buffer
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        self._buffer = bytearray()
+        self._frames = 0
+        self._flushed = monotonic()
+        self._transmit(packet)
+
+    @abc.abstractmethod
+    def _transmit(self, packet: bytes):
+        """
+        将一个数据包发送给所有订阅者
+        """
+
+
+class UDPPort(NetworkPort):
+    """
+    UDPPort UDP 端口：
+    以非阻塞的方式向多个订阅者（单播或组播地址）发送数据报，发送缓冲区满时直接丢弃
+    """
+
+    def __init__(self, subscribers: Union[Tuple[str, int], List[Tuple[str, int]]],
+                 mtu=1472, max_delay=0.01, sndbuf=1 << 22, ttl=1) -> None:
+        """
+        参数说明：  
+        - subscribers: 订阅者地址(host, port) 或其列表，可以是组播地址；  
+        - ttl: 组播数据报的生存时间
+        """
+        super().__init__(mtu, max_delay, sndbuf)
+        self.subscribers = subscribers if isinstance(
+            subscribers, list) else [subscribers]
+        self.ttl = ttl
+        self._sock = None
+
+    def add_subscriber(self, address: Tuple[str, int]):
+        if address not in self.subscribers:
+            self.subscribers.append(address)
+        if self._sock is not None:
+            self._join(address)
+
+    def remove_subscriber(self, address: Tuple[str, int]):
+        if address in self.subscribers:
+            self.subscribers.remove(address)
+
+    def _join(self, address: Tuple[str, int]):
+        if ipaddress.ip_address(address[0]).is_multicast:
+            self._sock.setsockopt(socket.IPPROTO_IP,
+                                  socket.IP_MULTICAST_TTL, self.ttl)
+
+    def turn_on(self):
+        if not self._is_on:
+            self._sock = self._socket(socket.SOCK_DGRAM)
+            for address in self.subscribers:
+                self._join(address)
+            self._is_on = True
+
+    def turn_off(self):
+        if self._is_on:
+            self.flush()
+            self._is_on = False
+            self._sock.close()
+            self._sock = None
+
+    def _transmit(self, packet: bytes):
+        for address in self.subscribers:
+            try:
+                self._sock.sendto(packet, address)
+            except OSError:  # 发送缓冲区已满或目标暂时不可达
+                self.dropped += 1
+
+
+class TCPPort(NetworkPort):
+    """
+    TCPPort TCP 端口：
+    在指定地址上监听，向所有已连接的订阅者发送相同的数据流。  
+    套接字为非阻塞的，未发出的数据暂存在各连接的缓冲区中，超过max_pending 字节的连接会被断开
+    """
+
+    def __init__(self, address: Tuple[str, int], mtu=1460, max_delay=0.01, sndbuf=1 << 22,
+                 max_pending=1 << 24) -> None:
+        super().__init__(mtu, max_delay, sndbuf)
+        self.address = address
+        self.max_pending = max_pending
+        self._server = None
+        self._clients = {}  # 连接 -> 未发出的数据
+        self._peers = {}  # 连接 -> 对方地址，连接断开后getpeername() 不再可用
+
+    @property
+    def subscribers(self):
+        return list(self._peers.values())
+
+    def turn_on(self):
+        if not self._is_on:
+            self._server = self._socket(socket.SOCK_STREAM)
+            self._server.setsockopt(
+                socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._server.bind(self.address)
+            self._server.listen()
+            self.address = self._server.getsockname()
+            self._is_on = True
+
+    def turn_off(self):
+        if self._is_on:
+            self.flush()
+            self._is_on = False
+            for client in list(self._clients):
+                self._drop(client)
+            self._server.close()
+            self._server = None
+
+    def wait_port_available(self):
+        """
+        接受新的订阅者
+        """
+        if not self._is_on:
+            raise IOError("端口打开异常！")
+        while True:
+            try:
+                client, address = self._server.accept()
+            except (BlockingIOError, OSError):
+                break
+            client.setsockopt(socket.SOL_SOCKET,
+                              socket.SO_SNDBUF, self.sndbuf)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client.setblocking(False)
+            self._clients[client] = bytearray()
+            self._peers[client] = address
+
+    def _drop(self, client):
+        del self._clients[client]
+        del self._peers[client]
+        client.close()
+
+    def _transmit(self, packet: bytes):
+        for client, pending in list(self._clients.items()):
+            pending += packet
+            try:
+                sent = client.send(pending)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._drop(client)
+                continue
+            del pending[:sent]
+            if len(pending) > self.max_pending:
+                self.dropped += 1
+                self._drop(client)
+
+
+class SharedMemoryPort(IPort):
+    """
+    SharedMemoryPort 共享内存端口：
+    将每帧数据写入共享内存中的单生产者、多消费者环形缓冲区，并更新序号。  
+    同一台机器上的其他进程通过RingBufferReader 直接读取，不经过序列化和系统调用
+    """
+
+    def __init__(self, channels: int, capacity=1 << 16, name: str = None) -> None:
+        """
+        参数说明：  
+        - channels: 每帧的通道数；  
+        - capacity: 缓冲区能容纳的帧数；  
+        - name: 共享内存的名称，默认自动生成，打开端口后可以从self.name 获得
+        """
+        super().__init__()
+        self.channels = channels
+        self.capacity = capacity
+        self.name = name
+        self.seq = 0
+        self._is_on = False
+        self._shm = None
+        self._data = None
+
+    def turn_on(self):
+        if not self._is_on:
+            self._shm = SharedMemory(self.name, create=True,
+                                     size=ringbuffer.HEADER.size + self.capacity * self.channels * 8)
+            self.name = self._shm.name
+            ringbuffer.OWNED.add(self.name)
+            self.seq = 0
+            ringbuffer.HEADER.pack_into(self._shm.buf, 0, ringbuffer.MAGIC,
+                                        self.channels, self.capacity, 0, 0)
+            self._data = self._shm.buf[ringbuffer.HEADER.size:].cast("d")
+            self._is_on = True
+
+    def turn_off(self):
+        if self._is_on:
+            self._is_on = False
+            self._data.release()
+            self._shm.close()
+            self._shm.unlink()
+            ringbuffer.OWNED.discard(self.name)
+            self._shm = None
+
+    def wait_port_available(self):
+        pass
+
+    def _publish(self):
+        # 先写数据再更新序号，读取方看到新序号时数据已经完整
+        ringbuffer.SEQ.pack_into(self._shm.buf, ringbuffer.SEQ_OFFSET, self.seq)
+
+    def send_data(self, data: List[float]):
+        if not self._is_on:
+            raise IOError("端口打开异常！")
+        if len(data) != self.channels:
+            raise ValueError("数据的通道数应为%d！" % self.channels)
+        offset = self.seq % self.capacity * self.channels
+        self._data[offset:offset + self.channels] = array("d", data)
+        self.seq += 1
+        self._publish()
+
+    def send_block(self, frames: List[List[float]]):
+        if not self._is_on:
+            raise IOError("端口打开异常！")
+        for data in frames:
+            if len(data) != self.channels:
+                raise ValueError("数据的通道数应为%d！" % self.channels)
+            offset = self.seq % self.capacity * self.channels
+            self._data[offset:offset + self.channels] = array("d", data)
+            self.seq += 1
+        self._publish()
@@ -0,0 +1,97 @@
+import struct
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+# 共享内存环形缓冲区的布局：
+# 包头 32 字节：标识"SGRB"、每帧通道数(uint32)、容量/帧(uint64)、已写入的总帧数(uint64)、保留(uint64)
+# 之后是capacity*channels 个float64，第seq 帧位于seq % capacity 处
+HEADER = struct.Struct("<4sIQQQ")
+MAGIC = b"SGRB"
+SEQ_OFFSET = 16
+SEQ = struct.Struct("<Q")
+
+# 本进程中由SharedMemoryPort 创建的共享内存，同一进程内的读取端不能注销它们的登记
+OWNED = set()
+
+
+def attach(name: str) -> SharedMemory:
+    """
+    连接到已存在的共享内存，读取方退出时不应删除它
+    """
+    try:
+        return SharedMemory(name, track=False)
+    except TypeError:  # Python 3.13 之前没有track 参数，打开后注销登记
+        shm = SharedMemory(name)
+        if name not in OWNED:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class RingBufferReader:
+    """
+    RingBufferReader 环形缓冲区的读取端：
+    与SharedMemoryPort 配合使用，每个读取端独立记录自己的读取位置，多个进程可以同时读取。  
+    read() 直接返回共享内存的视图，不复制数据；写入方追上读取位置时，最旧的数据会被跳过并计入lost。  
+    写入方在更新序号之前就开始写入下一帧，因此缓冲区中最多只有capacity-1 帧可以安全读取
+    """
+
+    def __init__(self, name: str, oldest=False):
+        """
+        参数说明：  
+        - name: 共享内存的名称，即SharedMemoryPort.name；  
+        - oldest: 为True 时从缓冲区中最旧的帧开始读，否则只读之后写入的帧
+        """
+        self.name = name
+        self._shm = attach(name)
+        magic, self.channels, self.capacity, head, _ = HEADER.unpack_from(
+            self._shm.buf)
+        if magic != MAGIC:
+            self._shm.close()
+            raise IOError("共享内存%s 不是信号发生器的环形缓冲区！" % name)
+        self._data = self._shm.buf[HEADER.size:].cast("d")
+        self.seq = max(0, head - self.capacity + 1) if oldest else head
+        self.lost = 0
+        self._last = self.seq
+
+    def head(self) -> int:
+        """
+        写入方已写入的总帧数
+        """
+        return SEQ.unpack_from(self._shm.buf, SEQ_OFFSET)[0]
+
+    def available(self) -> int:
+        """
+        尚未读取的帧数
+        """
+        return min(self.head() - self.seq, self.capacity - 1)
+
+    def read(self, max_frames: int = None) -> memoryview:
+        """
+        读取尚未读取的帧，返回形状为(frames, channels) 的float64 视图，没有新数据时返回长度为0 的一维视图。  
+        为避免复制，一次只返回到缓冲区末尾为止的连续数据，回绕部分留到下次读取。  
+        视图在写入方追上之前有效，可以用valid() 检查；关闭读取端之前需要释放所有视图
+        """
+        head = self.head()
+        if head - self.seq >= self.capacity:  # 最旧的一帧随时会被写入方覆盖，不再读取
+            self.lost += head - self.capacity + 1 - self.seq
+            self.seq = head - self.capacity + 1
+        slot = self.seq % self.capacity
+        frames = min(head - self.seq, self.capacity - slot)
+        if max_frames is not None:
+            frames = min(frames, max_frames)
+        view = self._data[slot * self.channels:(slot + frames) * self.channels]
+        self._last = self.seq
+        self.seq += frames
+        if frames == 0:
+            return view  # 形状中含0 的视图无法cast
+        return view.cast("B").cast("d", (frames, self.channels))
+
+    def valid(self) -> bool:
+        """
+        上一次read() 返回的数据是否仍未被覆盖，正在写入的第head 帧占用第head-capacity 帧的位置
+        """
+        return self.head() - self.capacity < self._last
+
+    def close(self):
+        self._data.release()
+        self._shm.close()
@@ -0,0 +1,290 @@
+"""
+信号发生器的性能测试，不需要硬件：
+
+    python benchmark.py -o before.json
+    python benchmark.py -o after.json -c before.json
+
+测量各IFunction 每个采样点的耗时、SerialPort 编码一帧与各端口发送一帧的耗时、
+Generator.run 端到端的吞吐量（含经pyserial loop:// 回环的SerialPort），
+以及GeneratorGroup 定时输出的抖动，结果保存为JSON，可以与之前的结果比较。
+每项测试先预热再重复多次，耗时与吞吐量取最好的一次，抖动取中位数
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+from statistics import mean, median
+from time import perf_counter, sleep
+from typing import List
+
+import serial
+
+from SignalGenerator.base import Generator, GeneratorGroup, IPort
+from SignalGenerator.functions import CIntTFunction, DefaultFunction, DIntTFunction, SinFunction
+from SignalGenerator.ports import SerialPort, SharedMemoryPort, TextPort, UDPPort
+
+
+class MemoryPort(IPort):
+    """
+    MemoryPort 内存端口：
+    只记录收到的帧数，可选地记录每帧的时刻，用于排除端口本身的开销
+    """
+
+    def __init__(self, timestamps=False) -> None:
+        super().__init__()
+        self.frames = 0
+        self.times = [] if timestamps else None
+
+    def turn_on(self):
+        pass
+
+    def turn_off(self):
+        pass
+
+    def wait_port_available(self):
+        pass
+
+    def send_data(self, data: List[float]):
+        self.frames += 1
+        if self.times is not None:
+            self.times.append(perf_counter())
+
+
+class LoopbackSerialPort(SerialPort):
+    """
+    LoopbackSerialPort 回环串口：
+    SerialPort 的发送逻辑不变，读写转到pyserial 的loop:// 回环上，写入后立即读空，不需要硬件
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(None, *args, **kwargs)  # 不指定端口时不会打开真实串口
+        self.loop = serial.serial_for_url("loop://", timeout=0)
+
+    @property
+    def out_waiting(self):
+        return self.loop.out_waiting
+
+    def isOpen(self):
+        return self.loop.is_open
+
+    def turn_on(self):
+        pass
+
+    def turn_off(self):
+        self.loop.close()
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        self.loop.flush()
+
+    def write(self, data):
+        count = self.loop.write(data)
+        self.loop.reset_input_buffer()
+        return count
+
+
+def result(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def best(measure, repeat: int) -> float:
+    """
+    预热一次后重复measure repeat 次，返回最小的耗时，排除调度与缓存带来的偶然波动
+    """
+    measure()
+    return min(measure() for _ in range(repeat))
+
+
+def timeit(func, count: int, repeat: int) -> float:
+    """
+    返回func 连续执行count 次的平均耗时(ns)，取repeat 次中最好的一次
+    """
+    def measure():
+        start = perf_counter()
+        for _ in range(count):
+            func()
+        return (perf_counter() - start) / count * 1e9
+    return best(measure, repeat)
+
+
+def bench_functions(count: int, repeat: int) -> dict:
+    results = {}
+    for cls in [DefaultFunction, DIntTFunction, CIntTFunction, SinFunction]:
+        func = cls()
+        results["function.%s.call" % cls.__name__] = result(
+            timeit(func.call, count, repeat), "ns/sample")
+
+        def measure():
+            func.reset()
+            start = perf_counter()
+            func.render(count)
+            return (perf_counter() - start) / count * 1e9
+        results["function.%s.render" % cls.__name__] = result(
+            best(measure, repeat), "ns/sample")
+    return results
+
+
+def bench_ports(count: int, repeat: int) -> dict:
+    data = [0.123456789, -1.5, 2.25e-7]
+    results = {}
+
+    serial = SerialPort(None, 115200)  # 不指定端口时不会打开串口
+    results["encode.SerialPort"] = result(
+        timeit(lambda: serial.encode(data), count, repeat), "ns/frame")
+
+    text = TextPort(io.BytesIO())
+    text.turn_on()
+    results["send.TextPort"] = result(
+        timeit(lambda: text.send_data(data), count, repeat), "ns/frame")
+    text.turn_off()
+
+    shm = SharedMemoryPort(len(data))
+    shm.turn_on()
+    results["send.SharedMemoryPort"] = result(
+        timeit(lambda: shm.send_data(data), count, repeat), "ns/frame")
+    shm.turn_off()
+
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    udp = UDPPort(receiver.getsockname())
+    udp.turn_on()
+    results["send.UDPPort"] = result(
+        timeit(lambda: udp.send_data(data), count, repeat), "ns/frame")
+    udp.turn_off()
+    receiver.close()
+    return results
+
+
+def bench_end_to_end(duration: float, runs: int) -> dict:
+    """
+    Generator 线程运行duration 秒，统计每秒输出的帧数，预热0.1 秒后开始计数，取runs 次中最高的速率。  
+    步长取1us，时钟始终落后，线程不会等待，测得的是可达到的最大速率
+    """
+    results = {}
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    ports = {  # 线程只能启动一次，每次运行都创建新的端口和发生器
+        "MemoryPort": MemoryPort,
+        "TextPort": lambda: TextPort(os.devnull),
+        "SharedMemoryPort": lambda: SharedMemoryPort(2),
+        "UDPPort": lambda: UDPPort(receiver.getsockname()),
+        # 带宽足够，不触发抽取；loop:// 对每个字节做一次队列操作，本身的开销占大部分
+        "SerialPort.loop": lambda: LoopbackSerialPort(int(1e9)),
+    }
+    for name, make in ports.items():
+        rates = []
+        for _ in range(runs):
+            counter = MemoryPort()
+            generator = Generator(1e-6, [DefaultFunction(), CIntTFunction()], [
+                                  make(), counter])
+            generator.turn_on()
+            generator.resume()
+            sleep(0.1)
+            start = counter.frames
+            sleep(duration)
+            rates.append((counter.frames - start) / duration)
+            generator.stop()  # 线程退出后关闭端口
+            generator.join()
+        results["run.%s" % name] = result(max(rates), "samples/s", "higher")
+    receiver.close()
+    return results
+
+
+def bench_jitter(duration: float, deltaT: float, runs: int) -> dict:
+    """
+    GeneratorGroup 按deltaT 定时输出，统计实际间隔与deltaT 的偏差，各项取runs 次的中位数
+    """
+    metrics = {"jitter.mean": [], "jitter.p99": [], "jitter.max": []}
+    for _ in range(runs):
+        port = MemoryPort(timestamps=True)
+        group = GeneratorGroup([Generator(deltaT, DefaultFunction(), port)])
+        group.turn_on()
+        group.resume()
+        sleep(duration)
+        group.stop()
+        group.join()
+        errors = sorted(abs(b - a - deltaT)
+                        for a, b in zip(port.times, port.times[1:]))
+        if not errors:
+            continue
+        metrics["jitter.mean"].append(mean(errors) * 1e6)
+        metrics["jitter.p99"].append(errors[int(len(errors) * 0.99)] * 1e6)
+        metrics["jitter.max"].append(errors[-1] * 1e6)
+    return {name: result(median(values), "us") for name, values in metrics.items() if values}
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform()}
+
+
+def compare(results: dict, baseline: dict, threshold: float, sched_threshold: float) -> bool:
+    """
+    打印与基准结果的比较，返回是否存在超过threshold 的性能退化（变慢或速率降低为1/(1+threshold)）。  
+    端到端吞吐量与抖动受线程调度影响较大，使用单独的sched_threshold
+    """
+    regressed = False
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before["value"]:
+            continue
+        ratio = current["value"] / before["value"]
+        limit = sched_threshold if name.startswith(("run.", "jitter.")) else threshold
+        worse = ratio > 1 + limit if current["better"] == "lower" \
+            else ratio < 1 / (1 + limit)
+        regressed |= worse
+        print("%-32s %14.2f -> %14.2f %-10s %+7.1f%%%s" % (
+            name, before["value"], current["value"], current["unit"], (ratio - 1) * 100,
+            "  退化" if worse else ""))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="信号发生器性能测试")
+    parser.add_argument("-o", "--output", help="保存结果的JSON 文件")
+    parser.add_argument("-c", "--compare", help="用于比较的基准JSON 文件")
+    parser.add_argument("-n", "--count", type=int, default=200000,
+                        help="函数、编码与发送测试每轮的执行次数")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="函数、编码与发送测试的轮数，取最好的一轮")
+    parser.add_argument("-d", "--duration", type=float, default=1.,
+                        help="端到端与抖动测试每次运行的时长(s)")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="端到端与抖动测试的运行次数")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="判定为退化的相对变化")
+    parser.add_argument("--sched-threshold", type=float, default=1.,
+                        help="端到端吞吐量与抖动判定为退化的相对变化")
+    args = parser.parse_args()
+
+    results = {}
+    results.update(bench_functions(args.count, args.repeat))
+    results.update(bench_ports(args.count, args.repeat))
+    results.update(bench_end_to_end(args.duration, args.runs))
+    results.update(bench_jitter(args.duration, 0.001, args.runs))
+
+    report = {"meta": metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        sys.exit(1 if compare(results, baseline, args.threshold, args.sched_threshold) else 0)
+    for name, current in results.items():
+        print("%-32s %14.2f %s" % (name, current["value"], current["unit"]))
+
+
+if __name__ == "__main__":
+    main()
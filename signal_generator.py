@@ -1,4 +1,5 @@
 from PySide2 import QtWidgets
+from PySide2.QtCore import QTimer
 from PySide2.QtWidgets import QApplication
 import serial
 from serial.tools.list_ports import comports
@@ -19,6 +20,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui.sg_btn_Start.clicked.connect(self.start)
         self.ui.sg_btn_Stop.clicked.connect(self.stop)
 
+        # 每秒在状态栏显示一次串口的实际吞吐量
+        self.status_timer = QTimer(self)
+        self.status_timer.timeout.connect(self.show_throughput)
+
     # 控制按钮的逻辑，包括开始、暂停、停止的功能
     def start(self):
         if self.pausable == True:
@@ -29,10 +34,12 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.inited:
             self.init_port()
         self.generator.resume()
+        self.status_timer.start(1000)
         self.ui.sg_btn_Start.setText("暂停")
         self.pausable = True
 
     def stop(self):
+        self.status_timer.stop()
         self.generator.stop()
         self.generator.resume()  # 需要确保信号产生的线程已退出
         self.ui.sg_btn_Start.setText("开始")
@@ -53,6 +60,14 @@ class MainWindow(QtWidgets.QMainWindow):
             float(self.ui.txt_signal_Omega.text()),
             float(self.ui.txt_signal_Phi.text())), self.port)
         self.generator.turn_on()
+        self.ui.statusbar.showMessage("链路预算 %d 字节/s，请求 %.1f 帧/s，准入 %.1f 帧/s" % (
+            self.port.byte_rate(), 1. / self.generator.deltaT, self.generator.admitted[0]))
+
+    def show_throughput(self):
+        stats = self.port.throughput()
+        self.ui.statusbar.showMessage("实际输出 %.1f 帧/s（%d 字节/s），已丢弃 %d 帧，抽取 1/%d，精度 %s" % (
+            stats["samples_per_second"], stats["bytes_per_second"], stats["dropped_samples"],
+            stats["decimation"], stats["precision"] or "完整"))
 
     # 图形界面的初始化工作
     def init(self):
@@ -0,0 +1,90 @@
+import pytest
+
+from Oscilloscope.capture import CaptureStore
+from SignalGenerator.ports import SharedMemoryPort
+from SignalGenerator.ringbuffer import RingBufferReader
+
+
+def test_read_and_summary_across_chunks(tmp_path):
+    store = CaptureStore(str(tmp_path), 1, deltaT=1., chunk=10)
+    store.append([[float(i)] for i in range(35)])
+    times, (values,) = store.read(8, 22)
+    assert list(times) == [float(i) for i in range(8, 22)]
+    assert list(values) == list(times)
+    assert [(s, e) for s, e, _, _ in store.summary(8, 22)] == [(0., 9.), (10., 19.), (20., 29.)]
+    assert store.summary(10, 20)[0][2:] == ((10.,), (19.,))
+    store.close()
+    assert store.span() == (0., 34.)
+
+
+def test_max_segments_bounds_files(tmp_path):
+    store = CaptureStore(str(tmp_path), 1, chunk=10, segment=2, max_segments=2)
+    store.append([[0.]] * 100)
+    store.close()
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_existing_capture_is_kept_unless_overwrite(tmp_path):
+    first = CaptureStore(str(tmp_path), 1, chunk=10)
+    first.append([[1.]] * 50)
+    first.close()
+    with pytest.raises(FileExistsError):
+        CaptureStore(str(tmp_path), 1, chunk=10)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    second = CaptureStore(str(tmp_path), 1, chunk=10, overwrite=True)
+    second.append([[2.]] * 10)
+    second.close()
+    assert [p.name for p in tmp_path.iterdir()] == ["segment-000000.bin"]
+    times, (values,) = second.read(0, 1)
+    assert list(values) == [2.] * 10
+
+
+class LappingReader(RingBufferReader):
+    """
+    复制数据期间写入方写满一圈的读取端
+    """
+
+    def __init__(self, name, port):
+        super().__init__(name)
+        self.port = port
+
+    def read(self, max_frames=None):
+        view = super().read(max_frames)
+        if len(view) and self.port is not None:
+            self.port.send_block([[-1.]] * self.capacity)
+            self.port = None  # 只追上一次
+        return view
+
+
+def test_pull_drops_frames_overwritten_during_copy(tmp_path):
+    port = SharedMemoryPort(1, capacity=16)
+    port.turn_on()
+    reader = LappingReader(port.name, port)
+    store = CaptureStore(str(tmp_path), 1, deltaT=1., chunk=8)
+    port.send_block([[float(i)] for i in range(10)])
+    count = store.pull(reader)
+    times, (values,) = store.read(0, 100)
+    assert list(values) == [-1.] * count  # 被覆盖的0..9 没有以原来的时刻保存
+    assert reader.lost + count == 26
+    assert list(times) == [float(i) for i in range(26 - count, 26)]
+    store.close()
+    reader.close()
+    port.turn_off()
+
+
+def test_pull_keeps_timestamps_across_overrun(tmp_path):
+    port = SharedMemoryPort(1, capacity=64)
+    port.turn_on()
+    reader = RingBufferReader(port.name)
+    store = CaptureStore(str(tmp_path), 1, deltaT=0.5, chunk=16)
+    for i in range(100):
+        port.send([float(i)])
+    assert store.pull(reader) == 63
+    assert reader.lost == 37
+    times, (values,) = store.read(0, 100)
+    assert list(values) == [float(i) for i in range(37, 100)]
+    assert list(times) == [i * 0.5 for i in range(37, 100)]
+    store.close()
+    reader.close()
+    port.turn_off()
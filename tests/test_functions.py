@@ -0,0 +1,62 @@
+import io
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from SignalGenerator.base import Generator
+from SignalGenerator.functions import CIntTFunction, DefaultFunction, DIntTFunction, SinFunction
+
+FUNCTIONS = [DefaultFunction, DIntTFunction, CIntTFunction,
+             lambda: SinFunction(A=2., omega=3., phi=0.5)]
+
+
+def close(a, b):
+    return all(x == pytest.approx(y, rel=1e-9, abs=1e-12) for x, y in zip(a, b))
+
+
+@pytest.mark.parametrize("make", FUNCTIONS)
+def test_render_matches_call(make):
+    rendered, called = make(), make()
+    values = rendered.render(1000)
+    assert len(values) == 1000
+    assert close(values, [called.call() for _ in range(1000)])
+
+
+@pytest.mark.parametrize("make", FUNCTIONS)
+def test_state_after_render_continues_like_call(make):
+    rendered, called = make(), make()
+    rendered.render(500)
+    expected = [called.call() for _ in range(500)]
+    assert rendered.value == pytest.approx(expected[-1], rel=1e-9, abs=1e-12)
+    assert rendered.timer == pytest.approx(called.timer, rel=1e-9)
+    assert close([rendered.call() for _ in range(100)],
+                 [called.call() for _ in range(100)])
+
+
+@pytest.mark.parametrize("make", [DefaultFunction, CIntTFunction, SinFunction])
+def test_pooled_chunks_match_serial_render(make):
+    serial, pooled = make(), make()
+    serial.render(10)
+    pooled.render(10)  # 从非零时刻开始
+    with ProcessPoolExecutor(2) as pool:
+        assert pooled.render(1000, pool, chunk=128) == serial.render(1000, chunk=128)
+    assert pooled.timer == serial.timer and pooled.value == serial.value
+
+
+def test_generator_render_interleaves_channels(tmp_path):
+    generator = Generator(0.001, [DefaultFunction(), CIntTFunction()], [])
+    out = io.BytesIO()
+    times, squares = generator.render(0.3, out, workers=2, chunk=64)
+    assert len(times) == len(squares) == 300
+
+    frames = array('d')
+    frames.frombytes(out.getvalue())
+    assert frames[0::2] == times and frames[1::2] == squares
+    assert close(times, [i * 0.001 for i in range(300)])
+    assert close(squares, [(i * 0.001) ** 2 * 0.5 for i in range(300)])
+
+    path = tmp_path / "frames.bin"
+    generator.reset()
+    generator.render(0.3, str(path), chunk=64)
+    assert path.read_bytes() == out.getvalue()
@@ -0,0 +1,167 @@
+from queue import Empty, Queue
+from time import perf_counter, sleep
+
+import pytest
+
+from SignalGenerator.base import Generator, GeneratorGroup, IPollingPort, IPort, PollingGenerator
+from SignalGenerator.functions import DefaultFunction
+
+
+class CountingPort(IPort):
+    def __init__(self) -> None:
+        super().__init__()
+        self.frames = []
+
+    def turn_on(self):
+        pass
+
+    def turn_off(self):
+        pass
+
+    def wait_port_available(self):
+        pass
+
+    def send_data(self, data):
+        self.frames.append(data)
+
+
+class QueuePollingPort(CountingPort, IPollingPort):
+    """
+    请求来自队列，应答记录在列表中
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests = Queue()
+        self.responses = []
+
+    def encode(self, data):
+        return b"%g;" % data[0]
+
+    def wait_request(self, timeout=None):
+        try:
+            return self.requests.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def respond(self, payload, frames=1):
+        self.responses.append((payload, frames))
+
+
+def test_run_is_paced_by_delta_t():
+    port = CountingPort()
+    generator = Generator(0.01, DefaultFunction(), port)
+    generator.turn_on()
+    generator.resume()
+    sleep(0.3)
+    generator.stop()
+    generator.join(1)
+    assert 20 <= len(port.frames) <= 40
+    assert generator.admitted == [100.]
+
+
+def test_polling_generator_answers_each_request_with_next_block():
+    port = QueuePollingPort()
+    generator = PollingGenerator(1., DefaultFunction(), port,
+                                 block=2, prefetch=4, timeout=0.01)
+    generator.turn_on()
+    generator.resume()
+    for _ in range(3):
+        port.requests.put(b"\n")
+    sleep(0.1)
+    generator.stop()
+    generator.join(1)
+    assert port.responses == [(b"0;1;", 2), (b"2;3;", 2), (b"4;5;", 2)]
+
+
+class BlockingPollingPort(QueuePollingPort):
+    """
+    模拟阻塞在串口读取中的端口，读取期间被关闭时记录下来
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reading = False
+        self.closed = False
+        self.closed_while_reading = False
+
+    def wait_request(self, timeout=None):
+        self.reading = True
+        sleep(timeout)
+        request = None if self.closed else super().wait_request(0)
+        self.reading = False
+        return request
+
+    def turn_off(self):
+        self.closed_while_reading |= self.reading
+        self.closed = True
+
+
+def test_polling_generator_closes_port_after_read_returns():
+    port = BlockingPollingPort()
+    generator = PollingGenerator(1., DefaultFunction(), port, timeout=0.05)
+    generator.turn_on()
+    generator.resume()
+    port.requests.put(b"\n")
+    sleep(0.12)
+    generator.stop()
+    assert not port.closed  # stop() 只设置标志，由线程关闭端口
+    generator.join(1)
+    assert not generator.is_alive()
+    assert port.closed and not port.closed_while_reading
+    assert len(port.responses) == 1
+
+
+def test_stop_turns_off_ports_of_paused_generator():
+    port = BlockingPollingPort()
+    generator = Generator(0.01, DefaultFunction(), port)
+    generator.turn_on()
+    generator.stop()
+    generator.join(1)
+    assert not generator.is_alive() and port.closed
+
+
+def test_polling_generator_requires_polling_port():
+    with pytest.raises(TypeError):
+        PollingGenerator(1., DefaultFunction(), CountingPort())
+
+
+class SlowPort(CountingPort):
+    def send_data(self, data):
+        sleep(0.1)
+        super().send_data(data)
+
+
+def test_group_rejects_non_multiple_delta_t():
+    with pytest.raises(ValueError):
+        GeneratorGroup([Generator(0.001, DefaultFunction(), CountingPort()),
+                        Generator(0.0015, DefaultFunction(), CountingPort())])
+
+
+def test_group_outputs_stay_sample_aligned():
+    fast, slow = CountingPort(), CountingPort()
+    group = GeneratorGroup([Generator(0.005, DefaultFunction(), fast),
+                            Generator(0.01, DefaultFunction(), slow)])
+    group.turn_on()
+    group.resume()
+    sleep(0.2)
+    group.pause()
+    sleep(0.05)
+    group.stop()
+    group.join(1)
+    assert len(slow.frames) == (len(fast.frames) + 1) // 2
+    for i, data in enumerate(slow.frames):  # 慢的发生器与快的发生器在同一节拍输出
+        assert abs(data[0] - fast.frames[2 * i][0]) < 1e-9
+
+
+def test_slow_port_does_not_block_pause():
+    group = GeneratorGroup([Generator(0.001, DefaultFunction(), SlowPort())])
+    group.turn_on()
+    group.resume()
+    sleep(0.05)
+    start = perf_counter()
+    group.pause()
+    assert perf_counter() - start < 0.01
+    group.stop()
+    group.join(1)
+    assert not group.is_alive()
@@ -0,0 +1,128 @@
+import socket
+import struct
+import time
+
+import pytest
+
+from SignalGenerator.base import Generator
+from SignalGenerator.functions import DefaultFunction
+from SignalGenerator.ports import NetworkPort, TCPPort, UDPPort
+
+
+def udp_receiver():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1)
+    return sock
+
+
+def unpack(packet):
+    seq, frames, channels = NetworkPort.HEADER.unpack_from(packet)
+    values = struct.unpack_from("<%dd" % (frames * channels),
+                                packet, NetworkPort.HEADER.size)
+    return seq, frames, channels, values
+
+
+def test_udp_packs_frames_up_to_mtu():
+    receiver = udp_receiver()
+    port = UDPPort(receiver.getsockname(), mtu=8 + 16 * 10, max_delay=60)
+    port.turn_on()
+    for i in range(25):
+        port.send([float(i), -float(i)])
+    port.turn_off()
+
+    # 第一帧距上一次发送已超过max_delay，单独发出，之后按MTU 打包
+    packets = [unpack(receiver.recv(2048)) for _ in range(4)]
+    assert [p[0] for p in packets] == [0, 1, 2, 3]
+    assert [p[1] for p in packets] == [1, 10, 10, 4]
+    assert all(p[2] == 2 for p in packets)
+    values = sum((p[3] for p in packets), ())
+    assert values[0::2] == tuple(float(i) for i in range(25))
+    assert values[1::2] == tuple(-float(i) for i in range(25))
+    receiver.close()
+
+
+def test_udp_sends_to_every_subscriber():
+    receivers = [udp_receiver() for _ in range(3)]
+    port = UDPPort([r.getsockname() for r in receivers[:2]])
+    port.turn_on()
+    port.add_subscriber(receivers[2].getsockname())
+    port.send([1.5])
+    port.flush()
+    for receiver in receivers:
+        assert unpack(receiver.recv(2048))[3] == (1.5,)
+        receiver.close()
+    port.turn_off()
+
+
+def test_single_frame_is_sent_without_flush():
+    receiver = udp_receiver()
+    port = UDPPort(receiver.getsockname(), max_delay=0.01)
+    port.turn_on()
+    port.send([1.])
+    assert unpack(receiver.recv(2048))[1:] == (1, 1, (1.,))
+    time.sleep(0.02)  # 低速时每一帧都距上一次发送超过max_delay
+    port.send([2.])
+    assert unpack(receiver.recv(2048))[1:] == (1, 1, (2.,))
+    port.turn_off()
+    receiver.close()
+
+
+def test_pause_flushes_buffered_frames():
+    receiver = udp_receiver()
+    port = UDPPort(receiver.getsockname(), max_delay=60)
+    generator = Generator(0.01, DefaultFunction(), port)
+    generator.turn_on()
+    generator.resume()
+    time.sleep(0.1)
+    generator.pause()
+    frames = sum(unpack(receiver.recv(2048))[1] for _ in range(2))
+    assert frames >= 5
+    generator.stop()
+    generator.join(1)
+    receiver.close()
+
+
+def test_frame_larger_than_mtu_is_rejected():
+    receiver = udp_receiver()
+    port = UDPPort(receiver.getsockname(), mtu=64)
+    port.turn_on()
+    with pytest.raises(ValueError):
+        port.send([0.] * 8)
+    port.turn_off()
+    receiver.close()
+
+
+def test_tcp_send_before_turn_on_raises_ioerror():
+    port = TCPPort(("127.0.0.1", 0))
+    with pytest.raises(IOError):
+        port.send([1.])
+
+
+def test_tcp_streams_to_clients_and_drops_disconnected():
+    port = TCPPort(("127.0.0.1", 0), max_delay=0)
+    port.turn_on()
+    stays = socket.create_connection(port.address)
+    leaves = socket.create_connection(port.address)
+    time.sleep(0.05)
+    port.send([1.])
+    assert len(port.subscribers) == 2
+
+    leaves.close()
+    deadline = time.monotonic() + 2
+    while len(port.subscribers) == 2 and time.monotonic() < deadline:
+        port.send([2.])
+        time.sleep(0.01)
+    assert len(port.subscribers) == 1
+    port.turn_off()
+
+    stays.settimeout(1)
+    data = b""
+    while True:
+        chunk = stays.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    seq, frames, channels, values = unpack(data)
+    assert (seq, frames, channels, values) == (0, 1, 1, (1.,))
+    stays.close()
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+
+from SignalGenerator.ports import SharedMemoryPort
+from SignalGenerator.ringbuffer import RingBufferReader
+
+
+def open_pair(channels=2, capacity=8):
+    port = SharedMemoryPort(channels, capacity=capacity)
+    port.turn_on()
+    return port, RingBufferReader(port.name)
+
+
+def test_empty_read_returns_empty_view():
+    port, reader = open_pair()
+    view = reader.read()
+    assert len(view) == 0
+    assert view.tolist() == []
+    view.release()
+    reader.close()
+    port.turn_off()
+
+
+def test_reads_frames_and_counts_overrun():
+    port, reader = open_pair()
+    for i in range(5):
+        port.send([float(i), -float(i)])
+    view = reader.read()
+    assert view.shape == (5, 2)
+    assert view.tolist()[-1] == [4., -4.]
+    view.release()
+
+    for i in range(5, 20):
+        port.send([float(i), -float(i)])
+    view = reader.read()
+    assert reader.lost == 8  # 只保留capacity-1 帧
+    assert view.tolist()[0] == [13., -13.]
+    view.release()
+    reader.close()
+    port.turn_off()
+
+
+def test_reader_in_other_process():
+    port, reader = open_pair()
+    port.send_block([[1., 2.], [3., 4.]])
+    code = ("from SignalGenerator.ringbuffer import RingBufferReader\n"
+            "r = RingBufferReader(%r, oldest=True)\n"
+            "v = r.read(); print(v.tolist()); v.release(); r.close()" % port.name)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, check=True)
+    assert out.stdout.strip() == "[[1.0, 2.0], [3.0, 4.0]]"
+    assert out.stderr == ""
+    reader.close()
+    port.turn_off()
@@ -0,0 +1,77 @@
+from time import perf_counter
+
+from SignalGenerator.ports import SerialPort
+
+
+class FakeSerialPort(SerialPort):
+    """
+    不打开真实串口，记录写入的数据，发送缓冲区中积压的字节数由测试指定
+    """
+
+    out_waiting = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(None, *args, **kwargs)
+        self.written = []
+
+    def isOpen(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.written.append(data)
+
+
+def test_admit_reduces_precision_then_decimates():
+    port = FakeSerialPort(9600)
+    assert port.byte_rate() == 960.
+    admitted = port.admit(1000.)
+    assert port.precision == port.min_precision
+    assert port.decimation == 13
+    assert admitted == 1000. / 13
+
+
+def test_admit_keeps_full_precision_when_link_fits():
+    port = FakeSerialPort(115200)
+    assert port.admit(100.) == 100.
+    assert port.precision is None
+    assert port.decimation == 1
+
+
+def test_send_data_does_not_sleep():
+    port = FakeSerialPort(115200)
+    port.admit(100.)
+    start = perf_counter()
+    for i in range(100):
+        port.send([float(i)])
+    assert perf_counter() - start < 0.05
+    assert len(port.written) == 100
+    assert port.throughput()["dropped_samples"] == 0
+
+
+def test_saturation_degrades_and_recovery_restores():
+    port = FakeSerialPort(9600, precision=6)
+    port.admit(10.)
+    assert (port.precision, port.decimation) == (6, 1)
+
+    port.out_waiting = 10000
+    for _ in range(5):
+        port.send([1.])
+    assert port.precision == port.min_precision
+    assert port.decimation > 1
+    assert port.dropped_samples > 0
+
+    port.out_waiting = 0
+    for _ in range(20):
+        port.send([1.])
+    assert (port.precision, port.decimation) == (6, 1)
+
+
+def test_respond_counts_frames():
+    port = FakeSerialPort(115200)
+    port.respond(b"1\n\r2\n\r", 2)
+    port.respond(b"3\n\r")
+    assert port.throughput()["sent_samples"] == 3
+    assert port.written == [b"1\n\r2\n\r", b"3\n\r"]
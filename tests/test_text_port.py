@@ -0,0 +1,57 @@
+import contextlib
+import io
+import sys
+
+import pytest
+
+from SignalGenerator.ports import TextPort
+
+
+def test_writes_csv_to_binary_file():
+    out = io.BytesIO()
+    port = TextPort(out, precision=3, block=2)
+    port.turn_on()
+    port.send([1.23456, 2.])
+    port.send([3., 4.])
+    port.send([5., 6.])
+    port.turn_off()
+    assert out.getvalue() == b"1.23,2\n3,4\n5,6\n"
+
+
+def test_falls_back_to_text_stdout():
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        port = TextPort(sep="\t")
+        port.turn_on()
+        port.send_block([[1., 2.], [3., 4.]])
+        port.turn_off()
+    assert out.getvalue() == "1\t2\n3\t4\n"
+
+
+def test_missing_stdout_raises_ioerror(monkeypatch):
+    monkeypatch.setattr(sys, "stdout", None)
+    with pytest.raises(IOError):
+        TextPort().turn_on()
+
+
+def test_send_block_rejects_ragged_rows():
+    out = io.BytesIO()
+    port = TextPort(out)
+    port.turn_on()
+    with pytest.raises(ValueError):
+        port.send_block([[1., 2.], [3.]])
+    port.turn_off()
+    assert out.getvalue() == b""
+
+
+def test_varying_block_sizes_do_not_grow_format_cache():
+    out = io.BytesIO()
+    port = TextPort(out, block=8)
+    port.turn_on()
+    for frames in range(1, 20):
+        port.send_block([[float(i)] for i in range(frames)])
+        port.flush()
+    port.turn_off()
+    assert out.getvalue() == b"".join(
+        b"".join(b"%d\n" % i for i in range(frames)) for frames in range(1, 20))
+    assert port._block_format is None or port._block_format[0] == 8